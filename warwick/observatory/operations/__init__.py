@@ -18,6 +18,7 @@
 
 from .dome_controller import DomeController
 from .environment import EnvironmentWatcher
+from .helpers import cached_connection, compile_validator
 from .config import Config
 from .constants import CommandStatus, OperationsMode, DomeStatus, ConditionStatus
 from .schedule import validate_schedule, parse_dome_window, parse_schedule_actions
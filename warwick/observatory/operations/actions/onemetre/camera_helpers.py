@@ -16,11 +16,10 @@
 
 """Helper functions for actions to interact with the cameras"""
 
+from concurrent.futures import ThreadPoolExecutor
 import sys
 import time
 import traceback
-from astropy.time import Time
-import astropy.units as u
 import Pyro4
 from warwick.observatory.common import daemons, log
 from warwick.observatory.camera.andor import CameraStatus, CommandStatus as CamCommandStatus
@@ -30,6 +29,13 @@ cameras = {
     #'red': daemons.onemetre_red_camera
 }
 
+# Snapshot of the camera identifiers for use in validation schemas
+camera_ids = tuple(cameras.keys())
+
+# Shared pool used by the actions to run camera commands in parallel
+# This is reused between action runs to avoid creating new threads each time
+cam_pool = ThreadPoolExecutor(max_workers=len(cameras), thread_name_prefix='cam')
+
 
 def cam_take_images(log_name, camera_id, count=1, config=None, quiet=False):
     """Start an exposure sequence with count images
@@ -74,6 +80,14 @@ def cam_status(log_name, camera_id):
         return None
 
 
+def cam_status_async(log_name, camera_id):
+    """
+    Queries the camera status on the shared camera pool
+    Returns a future that resolves to the cam_status return value
+    """
+    return cam_pool.submit(cam_status, log_name, camera_id)
+
+
 def cam_stop(log_name, camera_id, timeout=-1):
     """Aborts any active exposure sequences
        if timeout > 0 block for up to this many seconds for the
@@ -87,14 +101,14 @@ def cam_stop(log_name, camera_id, timeout=-1):
             return False
 
         if timeout > 0:
-            timeout_end = Time.now() + timeout * u.second
+            timeout_end = time.monotonic() + timeout
             while True:
                 with cameras[camera_id].connect() as camd:
                     data = camd.report_status()
                     if data.get('state', CameraStatus.Idle) in [CameraStatus.Idle, CameraStatus.Disabled]:
                         return True
 
-                wait = min(1, (timeout_end - Time.now()).to(u.second).value)
+                wait = min(1, timeout_end - time.monotonic())
                 if wait <= 0:
                     return False
 
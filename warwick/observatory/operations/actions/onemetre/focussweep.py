@@ -21,8 +21,7 @@
 
 import datetime
 import threading
-from warwick.observatory.operations import TelescopeAction, TelescopeActionStatus
-from warwick.observatory.common import validation
+from warwick.observatory.operations import TelescopeAction, TelescopeActionStatus, compile_validator
 from warwick.observatory.pipeline import configure_standard_validation_schema as pipeline_schema
 from warwick.observatory.camera.andor import configure_validation_schema as camera_schema
 from .telescope_helpers import tel_slew_radec, tel_stop, tel_set_focus
@@ -69,6 +68,9 @@ CONFIG_SCHEMA = {
 
 class FocusSweep(TelescopeAction):
     """Telescope action to do a focus sweep on a defined field"""
+    # Validator for the assembled schema is built on first use
+    _validator = None
+
     def __init__(self, log_name, config):
         super().__init__('Focus Sweep', log_name, config)
         self._wait_condition = threading.Condition()
@@ -78,14 +80,16 @@ class FocusSweep(TelescopeAction):
     @classmethod
     def validate_config(cls, config_json):
         """Returns an iterator of schema violations for the given json configuration"""
-        schema = {}
-        schema.update(CONFIG_SCHEMA)
+        if cls._validator is None:
+            schema = dict(CONFIG_SCHEMA)
+            schema['properties'] = dict(CONFIG_SCHEMA['properties'])
 
-        # TODO: Support action config for blue or red (telescope or instrument) focus
-        schema['properties']['blue'] = camera_schema('blue')
-        schema['properties']['pipeline'] = pipeline_schema()
+            # TODO: Support action config for blue or red (telescope or instrument) focus
+            schema['properties']['blue'] = camera_schema('blue')
+            schema['properties']['pipeline'] = pipeline_schema()
+            cls._validator = compile_validator(schema)
 
-        return validation.validation_errors(config_json, schema)
+        return cls._validator.iter_errors(config_json)
 
     def run_thread(self):
         """Thread that runs the hardware actions"""
@@ -29,7 +29,7 @@ from warwick.observatory.operations import TelescopeAction, TelescopeActionStatu
 from warwick.observatory.common import log
 from warwick.observatory.camera.andor import CommandStatus as CamCommandStatus
 from .telescope_helpers import tel_status, tel_init, tel_home, tel_park
-from .camera_helpers import cameras, cam_status
+from .camera_helpers import cameras, cam_pool, cam_status, cam_status_async
 
 CAM_INIT_TIMEOUT = 30
 
@@ -42,17 +42,25 @@ class Initialize(TelescopeAction):
         super().__init__('Initializing', log_name, {})
 
         self._cooling_condition = threading.Condition()
+        self._locked_cameras = set()
 
     def __initialize_camera(self, camera_id):
         """Initializes a given camera and enables cooling"""
+        # A camera that is already temperature locked was left initialized and
+        # only needs to be reset, avoiding a new cooling cycle
+        status = cam_status(self.log_name, camera_id)
+        locked = status is not None and status.get('temperature_locked', False)
+
         try:
-            self.set_task('Initializing Cameras')
             with cameras[camera_id].connect(timeout=CAM_INIT_TIMEOUT) as cam:
-                status = cam.initialize()
-                if status not in [CamCommandStatus.Succeeded,
-                                  CamCommandStatus.CameraNotUninitialized]:
-                    log.error(self.log_name, 'Failed to initialize camera ' + camera_id)
-                    return False
+                # The camera must not be reconfigured if it failed to initialize,
+                # so the commands are sent one at a time
+                if not locked:
+                    status = cam.initialize()
+                    if status not in [CamCommandStatus.Succeeded,
+                                      CamCommandStatus.CameraNotUninitialized]:
+                        log.error(self.log_name, 'Failed to initialize camera ' + camera_id)
+                        return False
 
                 # Calling configure with an empty dictionary resets everything to defaults
                 if cam.configure({}, quiet=True) != CamCommandStatus.Succeeded:
@@ -65,6 +73,10 @@ class Initialize(TelescopeAction):
             log.error(self.log_name, 'Unknown error with camera ' + camera_id)
             traceback.print_exc(file=sys.stdout)
             return False
+
+        if locked:
+            with self._cooling_condition:
+                self._locked_cameras.add(camera_id)
         return True
 
     def __wait_for_temperature_lock(self):
@@ -74,21 +86,30 @@ class Initialize(TelescopeAction):
         """
         # Wait for cameras to cool if required
         self.set_task('Cooling cameras')
-        locked = {k: False for k in cameras}
 
         while not self.aborted:
-            for camera_id in cameras:
-                status = cam_status(self.log_name, camera_id)
-                if 'temperature_locked' not in status:
+            # Cameras that have already reached temperature lock don't need to be queried again
+            with self._cooling_condition:
+                pending = [camera_id for camera_id in cameras if camera_id not in self._locked_cameras]
+
+            # Query all cameras concurrently so that each tick is limited by the slowest camera
+            futures = {camera_id: cam_status_async(self.log_name, camera_id) for camera_id in pending}
+
+            for camera_id, future in futures.items():
+                status = future.result()
+                if status is None or 'temperature_locked' not in status:
                     log.error(self.log_name, 'Failed to check temperature on camera ' + camera_id)
                     return False
 
-                locked[camera_id] = status['temperature_locked']
-
-            if all([locked[k] for k in locked]):
-                break
+                if status['temperature_locked']:
+                    with self._cooling_condition:
+                        self._locked_cameras.add(camera_id)
 
+            # The wait is woken early if the action is aborted
             with self._cooling_condition:
+                if len(self._locked_cameras) == len(cameras):
+                    break
+
                 self._cooling_condition.wait(CAMERA_CHECK_INTERVAL)
         return not self.aborted
 
@@ -112,10 +133,14 @@ class Initialize(TelescopeAction):
 
     def run_thread(self):
         """Thread that runs the hardware actions"""
-        for camera_id in cameras:
-            if not self.__initialize_camera(camera_id):
-                self.status = TelescopeActionStatus.Error
-                return
+        # Initialize all cameras in parallel so that the startup time is set by the slowest camera
+        # Each call opens its own connection to the camera daemon
+        self.set_task('Initializing Cameras')
+        initialized = list(cam_pool.map(self.__initialize_camera, cameras))
+
+        if not all(initialized):
+            self.status = TelescopeActionStatus.Error
+            return
 
         if not self.__initialize_telescope():
             self.status = TelescopeActionStatus.Error
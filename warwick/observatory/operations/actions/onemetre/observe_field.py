@@ -19,6 +19,7 @@
 # pylint: disable=too-many-return-statements
 # pylint: disable=too-many-branches
 
+import math
 import threading
 import time
 
@@ -31,13 +32,13 @@ import numpy as np
 from scipy import conjugate, polyfit
 from scipy.fftpack import fft, ifft
 
-from warwick.observatory.operations import TelescopeAction, TelescopeActionStatus
-from warwick.observatory.common import log, validation
+from warwick.observatory.operations import TelescopeAction, TelescopeActionStatus, compile_validator
+from warwick.observatory.common import log
 from warwick.observatory.pipeline import configure_standard_validation_schema as pipeline_schema
 from warwick.observatory.camera.andor import configure_validation_schema as camera_schema
 from warwick.observatory.camera.andor import CameraStatus
 from .telescope_helpers import tel_slew_radec, tel_offset_radec, tel_stop
-from .camera_helpers import cameras, cam_status, cam_take_images, cam_stop
+from .camera_helpers import cameras, camera_ids, cam_status, cam_take_images, cam_stop
 from .pipeline_helpers import configure_pipeline
 
 SLEW_TIMEOUT = 120
@@ -58,6 +59,10 @@ WCS_EXPOSURE_TIME = 5 * u.s
 # Amount of time to wait between camera status checks while observing
 CAM_CHECK_STATUS_DELAY = 10 * u.s
 
+# Pixel (1-indexed FITS convention) that is used to measure the field center
+# TODO: Remove hardcoded geometry assumption
+FIELD_CENTER_PIXEL = (1025, 1025)
+
 # Note: pipeline and camera schemas are inserted in the validate_config method
 CONFIG_SCHEMA = {
     'type': 'object',
@@ -85,7 +90,7 @@ CONFIG_SCHEMA = {
         },
         'guide_camera': {
             'type': 'string',
-            'enum': cameras.keys(),
+            'enum': camera_ids,
         }
     }
 }
@@ -128,6 +133,44 @@ def cross_correlate(check, reference):
     return len(corr) + (coeffs[1] / (2 * coeffs[0]))
 
 
+def field_center_radec(headers):
+    """
+    Returns the (ra, dec) in degrees of FIELD_CENTER_PIXEL for the WCS solution in headers
+    Plain TAN solutions are evaluated directly, avoiding the cost of constructing a full
+    astropy WCS object. Solutions that include distortion terms fall back to astropy.
+    """
+    if headers.get('CTYPE1') == 'RA---TAN' and headers.get('CTYPE2') == 'DEC--TAN' \
+            and 'A_ORDER' not in headers and not any(k.startswith('PV') for k in headers):
+        dx = FIELD_CENTER_PIXEL[0] - headers['CRPIX1']
+        dy = FIELD_CENTER_PIXEL[1] - headers['CRPIX2']
+        if 'CD1_1' in headers:
+            cd11 = headers['CD1_1']
+            cd12 = headers.get('CD1_2', 0)
+            cd21 = headers.get('CD2_1', 0)
+            cd22 = headers['CD2_2']
+        else:
+            cdelt1 = headers.get('CDELT1', 1)
+            cdelt2 = headers.get('CDELT2', 1)
+            cd11 = headers.get('PC1_1', 1) * cdelt1
+            cd12 = headers.get('PC1_2', 0) * cdelt1
+            cd21 = headers.get('PC2_1', 0) * cdelt2
+            cd22 = headers.get('PC2_2', 1) * cdelt2
+
+        # Inverse gnomonic projection from standard coordinates
+        xi = math.radians(cd11 * dx + cd12 * dy)
+        eta = math.radians(cd21 * dx + cd22 * dy)
+        ra0 = math.radians(headers['CRVAL1'])
+        dec0 = math.radians(headers['CRVAL2'])
+        denom = math.cos(dec0) - eta * math.sin(dec0)
+        ra = math.degrees(ra0 + math.atan2(xi, denom)) % 360
+        dec = math.degrees(math.atan2(math.sin(dec0) + eta * math.cos(dec0), math.hypot(xi, denom)))
+        return ra, dec
+
+    ra, dec = wcs.WCS(headers).all_pix2world(FIELD_CENTER_PIXEL[0], FIELD_CENTER_PIXEL[1], 1,
+                                             ra_dec_order=True)
+    return float(ra), float(dec)
+
+
 class WCSStatus:
     Inactive, WaitingForWCS, WCSFailed, WCSComplete = range(4)
 
@@ -189,7 +232,8 @@ class CameraWrapper:
             return
 
         if self.status == CameraWrapperStatus.Stopping:
-            if cam_status(self._log_name, self.camera_id).get('state', CameraStatus.Idle) == CameraStatus.Idle:
+            status = cam_status(self._log_name, self.camera_id) or {}
+            if status.get('state', CameraStatus.Idle) == CameraStatus.Idle:
                 self.status = CameraWrapperStatus.Stopped
                 return
 
@@ -198,7 +242,8 @@ class CameraWrapper:
             return
 
         # Exposure has timed out: lets find out why
-        status = cam_status(self._log_name, self.camera_id).get('state', None)
+        # cam_status returns None if the camera daemon can't be contacted
+        status = (cam_status(self._log_name, self.camera_id) or {}).get('state', None)
 
         # Lost communication with camera daemon, this is assumed to be unrecoverable
         if status is None:
@@ -220,17 +265,26 @@ class CameraWrapper:
 
 class ObserveField(TelescopeAction):
     """Telescope action to observe a sidereally tracked field"""
+    # Validator for the assembled schema is built on first use
+    _validator = None
+
     def __init__(self, log_name, config):
         super().__init__('Observe Field', log_name, config)
         self._wait_condition = threading.Condition()
 
+        # Set when a WCS measurement completes, or the action is aborted or the dome changes state
+        self._wcs_done = threading.Event()
+
         # TODO: Validate that end > start
         self._start_date = Time(config['start'])
         self._end_date = Time(config['end'])
         self._guide_camera = config['guide_camera']
 
+        # The target is fixed for the lifetime of the action, so only construct it once
+        self._target = SkyCoord(config['ra'], config['dec'], unit=u.degree)
+
         self._wcs_status = WCSStatus.Inactive
-        self._wcs = None
+        self._field_center = None
 
         self._observation_status = ObservationStatus.PositionLost
         self._is_guiding = False
@@ -243,14 +297,15 @@ class ObserveField(TelescopeAction):
     @classmethod
     def validate_config(cls, config_json):
         """Returns an iterator of schema violations for the given json configuration"""
-        schema = {}
-        schema.update(CONFIG_SCHEMA)
-        for camera_id in cameras:
-            schema['properties'][camera_id] = camera_schema(camera_id)
-
-        schema['properties']['pipeline'] = pipeline_schema()
+        if cls._validator is None:
+            schema = dict(CONFIG_SCHEMA)
+            schema['properties'] = dict(CONFIG_SCHEMA['properties'])
+            for camera_id in cameras:
+                schema['properties'][camera_id] = camera_schema(camera_id)
+            schema['properties']['pipeline'] = pipeline_schema()
+            cls._validator = compile_validator(schema)
 
-        return validation.validation_errors(config_json, schema)
+        return cls._validator.iter_errors(config_json)
 
     def __set_failed_status(self):
         """Sets self.status to Complete if aborted otherwise Error"""
@@ -265,13 +320,15 @@ class ObserveField(TelescopeAction):
         :param target: Astropy time to wait for
         :return: True if the time has been reached, false if aborted
         """
-        while True:
-            remaining = target_time - Time.now()
-            if remaining < 0 or self.aborted or not self.dome_is_open:
-                break
+        # Convert to a monotonic deadline once so the loop doesn't need to construct astropy Times
+        deadline = time.monotonic() + (target_time - Time.now()).to_value(u.second)
+        with self._wait_condition:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining < 0 or self.aborted or not self.dome_is_open:
+                    break
 
-            with self._wait_condition:
-                self._wait_condition.wait(min(10, remaining.to(u.second).value))
+                self._wait_condition.wait(min(10, remaining))
 
         return not self.aborted and self.dome_is_open
 
@@ -303,7 +360,7 @@ class ObserveField(TelescopeAction):
 
         # Converge on requested position
         attempt = 1
-        target = SkyCoord(self.config['ra'], self.config['dec'], unit=u.degree)
+        self._wcs_done.clear()
         while not self.aborted and self.dome_is_open:
             # Wait for telescope position to settle before taking first image
             time.sleep(5)
@@ -313,7 +370,7 @@ class ObserveField(TelescopeAction):
             else:
                 self.set_task('Measuring position')
 
-            self._wcs = None
+            self._field_center = None
             self._wcs_status = WCSStatus.WaitingForWCS
 
             print('ObserveField: taking test image')
@@ -326,15 +383,16 @@ class ObserveField(TelescopeAction):
                     return ObservationStatus.Error
 
             # Wait for new frame
-            expected_complete = Time.now() + WCS_EXPOSURE_TIME + MAX_PROCESSING_TIME
-
-            while True:
-                with self._wait_condition:
-                    remaining = expected_complete - Time.now()
-                    if remaining < 0 or self._wcs_status != WCSStatus.WaitingForWCS:
-                        break
-
-                    self._wait_condition.wait(max(remaining.to(u.second).value, 1))
+            # The event is cleared only after waiting so that an abort or dome change
+            # that arrives while the image is being started isn't lost
+            self._wcs_done.wait((WCS_EXPOSURE_TIME + MAX_PROCESSING_TIME).to_value(u.second))
+            self._wcs_done.clear()
+
+            # The wait was interrupted by an abort or dome change rather than a WCS result
+            if self.aborted or not self.dome_is_open:
+                self._wcs_status = WCSStatus.Inactive
+                cam_stop(self.log_name, self._guide_camera)
+                break
 
             failed = self._wcs_status == WCSStatus.WCSFailed
             timeout = self._wcs_status == WCSStatus.WaitingForWCS
@@ -353,10 +411,9 @@ class ObserveField(TelescopeAction):
                 continue
 
             # Calculate frame center and offset from expected pointing
-            # TODO: Remove hardcoded geometry assumption
-            actual_ra, actual_dec = self._wcs.all_pix2world(1024, 1024, 0, ra_dec_order=True)
+            actual_ra, actual_dec = self._field_center
             actual = SkyCoord(actual_ra, actual_dec, unit=u.degree)
-            offset_ra, offset_dec = actual.spherical_offsets_to(target)
+            offset_ra, offset_dec = actual.spherical_offsets_to(self._target)
 
             print('ObserveField: offset is {:.1f}, {:.1f} arcsec'.format(
                 offset_ra.to_value(u.arcsecond),
@@ -372,6 +429,13 @@ class ObserveField(TelescopeAction):
             if not tel_offset_radec(self.log_name, offset_ra.to_value(u.deg), offset_dec.to_value(u.deg), SLEW_TIMEOUT):
                 return ObservationStatus.Error
 
+        # Acquisition was interrupted, which is not a WCS failure
+        if self.aborted:
+            return ObservationStatus.Complete
+
+        log.error(self.log_name, 'Aborting because dome is not open')
+        return ObservationStatus.Error
+
     def __observe_field(self):
         # Start science observations
         pipeline_config = {
@@ -480,6 +544,7 @@ class ObserveField(TelescopeAction):
         # Cameras will be aborted from the run thread
         tel_stop(self.log_name)
 
+        self._wcs_done.set()
         with self._wait_condition:
             self._wait_condition.notify_all()
 
@@ -487,6 +552,7 @@ class ObserveField(TelescopeAction):
         """Notification called when the dome is fully open or fully closed"""
         super().dome_status_changed(dome_is_open)
 
+        self._wcs_done.set()
         with self._wait_condition:
             self._wait_condition.notify_all()
 
@@ -499,12 +565,13 @@ class ObserveField(TelescopeAction):
         with self._wait_condition:
             if self._wcs_status == WCSStatus.WaitingForWCS:
                 if 'CRVAL1' in headers:
-                    self._wcs = wcs.WCS(headers)
+                    self._field_center = field_center_radec(headers)
                     self._wcs_status = WCSStatus.WCSComplete
                 else:
                     self._wcs_status = WCSStatus.WCSFailed
 
                 self._wait_condition.notify_all()
+                self._wcs_done.set()
 
     def received_guide_profile(self, headers, profile_x, profile_y):
         """Notification called when a guide profile has been calculated by the data pipeline"""
@@ -16,36 +16,43 @@
 
 """Helper functions for actions to interact with the pipeline"""
 
+import os
 import sys
 import traceback
 import Pyro4
 from warwick.observatory.common import daemons, log
+from warwick.observatory.operations import cached_connection
 from warwick.observatory.pipeline import CommandStatus as PipelineCommandStatus
 
+# Tracebacks for unexpected errors are only printed when OPSD_DEBUG is set in the environment
+_DEBUG = bool(os.environ.get('OPSD_DEBUG'))
+
 
 def pipeline_enable_archiving(log_name, camera_id, enabled):
     """Toggle archiving on or off for a given arm name"""
     try:
-        with daemons.onemetre_pipeline.connect() as pipeline:
+        with cached_connection(daemons.onemetre_pipeline) as pipeline:
             return pipeline.set_archive(camera_id, enabled) == PipelineCommandStatus.Succeeded
     except Pyro4.errors.CommunicationError:
         log.error(log_name, 'Failed to communicate with pipeline daemon')
         return False
     except Exception:
         log.error(log_name, 'Unknown error while configuring pipeline')
-        traceback.print_exc(file=sys.stdout)
+        if _DEBUG:
+            traceback.print_exc(file=sys.stdout)
         return False
 
 
 def configure_pipeline(log_name, config, quiet=False):
     """Update pipeline configuration"""
     try:
-        with daemons.onemetre_pipeline.connect() as pipeline:
+        with cached_connection(daemons.onemetre_pipeline) as pipeline:
             return pipeline.configure(config, quiet=quiet) == PipelineCommandStatus.Succeeded
     except Pyro4.errors.CommunicationError:
         log.error(log_name, 'Failed to communicate with pipeline daemon')
         return False
     except Exception:
         log.error(log_name, 'Unknown error while configuring pipeline')
-        traceback.print_exc(file=sys.stdout)
+        if _DEBUG:
+            traceback.print_exc(file=sys.stdout)
         return False
@@ -19,9 +19,9 @@
 # pylint: disable=too-many-return-statements
 # pylint: disable=too-many-branches
 
-import datetime
 import sys
 import threading
+import time
 import traceback
 import Pyro4
 
@@ -29,12 +29,12 @@ from astropy.coordinates import get_sun, EarthLocation, AltAz
 from astropy.time import Time
 from astropy import units as u
 
-from warwick.observatory.operations import TelescopeAction, TelescopeActionStatus
-from warwick.observatory.common import log, validation
+from warwick.observatory.operations import TelescopeAction, TelescopeActionStatus, compile_validator
+from warwick.observatory.common import log
 from warwick.observatory.pipeline import configure_flats_validation_schema as pipeline_schema
 from warwick.observatory.camera.andor import configure_validation_schema as camera_schema
 from .telescope_helpers import tel_status, tel_slew_altaz
-from .camera_helpers import cameras, cam_stop
+from .camera_helpers import cameras, cam_pool, cam_stop
 from .pipeline_helpers import pipeline_enable_archiving, configure_pipeline
 
 SLEW_TIMEOUT = 120
@@ -62,7 +62,12 @@ CONFIG = {
     # Range of sun angles where we can acquire useful data
     'max_sun_altitude': -6,
     'min_sun_altitude': -10,
-    'sun_altitude_check_interval': 30,
+
+    # Sun altitude checks are scheduled based on the distance from the threshold altitude
+    # The rate is the maximum apparent motion of the sun (0.25 deg/min) so the threshold is never overshot
+    'sun_altitude_rate': 0.0042,
+    'min_sun_altitude_check_interval': 5,
+    'max_sun_altitude_check_interval': 60,
 
     # Exposure fudge factor to account for changing sky brightness
     'evening_scale': 1.07,
@@ -97,16 +102,19 @@ CONFIG = {
     }
 }
 
-def sun_position(location):
-    """Returns current (alt, az) of sun in degrees for the given location"""
-    now = Time(datetime.datetime.utcnow(), format='datetime', scale='utc')
-    frame = AltAz(obstime=now, location=location)
-    sun = get_sun(now).transform_to(frame)
+def sun_position(frame):
+    """Returns current (alt, az) of sun in degrees for the location of the given AltAz frame"""
+    now = Time.now()
+    sun = get_sun(now).transform_to(frame.replicate(obstime=now))
     return sun.alt.value, sun.az.value
 
 
 class CameraWrapper:
     """Holds camera-specific flat state"""
+    # Attributes are accessed on every received frame, so use slots instead of a per-instance dict
+    __slots__ = ('camera_id', 'bias', 'state', '_daemon', '_log_name', '_camera_config', '_expected_complete',
+                 '_is_evening', '_scale', '_start_exposure', '_start_time', '_exposure_count', '_log_prefix')
+
     def __init__(self, camera_id, daemon, camera_config, is_evening, log_name):
         self.camera_id = camera_id
         self.bias = 0
@@ -114,39 +122,55 @@ class CameraWrapper:
         self._daemon = daemon
         self._log_name = log_name
         self._camera_config = camera_config
-        self._expected_complete = datetime.datetime.utcnow()
+        self._expected_complete = time.monotonic()
         self._is_evening = is_evening
         self._scale = CONFIG['evening_scale'] if is_evening else CONFIG['dawn_scale']
         self._start_exposure = CONFIG['min_exposure'] if is_evening else CONFIG['min_save_exposure']
         self._start_time = None
         self._exposure_count = 0
 
+        # Log message prefix is built once instead of concatenated for every frame
+        self._log_prefix = 'AutoFlat: camera ' + camera_id + ' '
+
     def start(self):
         """Starts the flat sequence for this camera"""
-        self.__take_image(0, 0)
-        self._start_time = datetime.datetime.utcnow()
+        now = time.monotonic()
+        self.__take_image(0, 0, now)
+        self._start_time = now
 
-    def check_timeout(self):
-        """Sets error state if an expected frame is more than 30 seconds late"""
+    def check_timeout(self, now):
+        """Sets error state if an expected frame is more than 30 seconds late
+           now is the current time.monotonic() value, shared between all cameras
+        """
         if self.state not in [AutoFlatState.Waiting, AutoFlatState.Saving]:
             return
 
-        if datetime.datetime.utcnow() > self._expected_complete:
-            print('AutoFlat: camera ' + self.camera_id + ' exposure timed out')
-            log.error(self._log_name, 'AutoFlat: camera ' + self.camera_id + ' exposure timed out')
+        if now > self._expected_complete:
+            message = self._log_prefix + 'exposure timed out'
+            print(message)
+            log.error(self._log_name, message)
             self.state = AutoFlatState.Error
 
-    def __take_image(self, exposure, delay):
+    def timeout_remaining(self):
+        """Returns the number of seconds until the expected frame times out, or None if no frame is expected"""
+        if self.state not in [AutoFlatState.Waiting, AutoFlatState.Saving]:
+            return None
+
+        return self._expected_complete - time.monotonic()
+
+    def __take_image(self, exposure, delay, now):
         """Tells the camera to take an exposure.
            if exposure is 0 then it will reset the camera
            configuration and take a bias with the shutter closed
+           now is the time.monotonic() value that the frame timeout is measured from
         """
-        self._expected_complete = datetime.datetime.utcnow() \
-            + datetime.timedelta(seconds=exposure + delay + CONFIG['max_processing_time'])
+        self._expected_complete = now + exposure + delay + CONFIG['max_processing_time']
         try:
             # Need to communicate directly with camera daemon
             # to allow set_exposure_delay and set_exposure
             with self._daemon.connect() as cam:
+                # Send all commands in a single round trip
+                batch = Pyro4.batch(cam)
                 if exposure == 0:
                     # .configure will reset all other parameters to their default values
                     cam_config = {}
@@ -155,13 +179,16 @@ class CameraWrapper:
                         'shutter': False,
                         'exposure': 0
                     })
-                    cam.configure(cam_config, quiet=True)
+                    batch.configure(cam_config, quiet=True)
                 else:
-                    cam.set_exposure_delay(delay, quiet=True)
-                    cam.set_exposure(exposure, quiet=True)
-                    cam.set_shutter(True, quiet=True)
+                    batch.set_exposure_delay(delay, quiet=True)
+                    batch.set_exposure(exposure, quiet=True)
+                    batch.set_shutter(True, quiet=True)
 
-                cam.start_sequence(1, quiet=True)
+                batch.start_sequence(1, quiet=True)
+
+                # Consume the results so that any exceptions are raised here
+                list(batch())
         except Pyro4.errors.CommunicationError:
             log.error(self._log_name, 'Failed to communicate with camera ' + self.camera_id)
             self.state = AutoFlatState.Error
@@ -174,6 +201,7 @@ class CameraWrapper:
         """Callback to process an acquired frame. headers is a dictionary of header keys"""
         last_state = self.state
         delay_exposure = 0
+        now = time.monotonic()
 
         if self.state == AutoFlatState.Bias:
             self.bias = headers['MEDCNTS']
@@ -181,50 +209,67 @@ class CameraWrapper:
 
             # Take the first flat image
             self.state = AutoFlatState.Waiting
-            self.__take_image(self._start_exposure, delay_exposure)
+            self.__take_image(self._start_exposure, delay_exposure, now)
 
         elif self.state == AutoFlatState.Waiting or self.state == AutoFlatState.Saving:
             if self.state == AutoFlatState.Saving:
                 self._exposure_count += 1
 
+            # Bind the configuration values once instead of repeating the dictionary lookups
+            target_counts = CONFIG['target_counts']
+            max_exposure_delta = CONFIG['max_exposure_delta']
+            max_exposure = CONFIG['max_exposure']
+            min_exposure = CONFIG['min_exposure']
+            min_save_counts = CONFIG['min_save_counts']
+            min_save_exposure = CONFIG['min_save_exposure']
+            evening_exposure_delays = CONFIG['evening_exposure_delays']
+
             exposure = headers['EXPTIME']
             counts = headers['MEDCNTS'] - self.bias
 
             # If the count rate is too low then we scale the exposure by the maximum amount
             if counts > 0:
-                new_exposure = self._scale * exposure * CONFIG['target_counts'] / counts
+                new_exposure = self._scale * exposure * target_counts / counts
             else:
-                new_exposure = exposure * CONFIG['max_exposure_delta']
+                new_exposure = exposure * max_exposure_delta
 
             # Clamp the exposure to a sensible range
-            clamped_exposure = min(new_exposure, CONFIG['max_exposure'], exposure * CONFIG['max_exposure_delta'])
-            clamped_exposure = max(clamped_exposure, CONFIG['min_exposure'], exposure / CONFIG['max_exposure_delta'])
+            # The lower limits are applied last so that they take precedence, as before
+            max_step_exposure = exposure * max_exposure_delta
+            min_step_exposure = exposure / max_exposure_delta
+            clamped_exposure = new_exposure
+            if clamped_exposure > max_step_exposure:
+                clamped_exposure = max_step_exposure
+            if clamped_exposure > max_exposure:
+                clamped_exposure = max_exposure
+            if clamped_exposure < min_step_exposure:
+                clamped_exposure = min_step_exposure
+            if clamped_exposure < min_exposure:
+                clamped_exposure = min_exposure
 
             clamped_desc = ' (clamped from {:.2f}s)'.format(new_exposure) if new_exposure > clamped_exposure else ''
-            print('AutoFlat: camera {} exposure {:.2f}s counts {:.0f} ADU -> {:.2f}s{}'
-                  .format(self.camera_id, exposure, counts, clamped_exposure, clamped_desc))
+            print(self._log_prefix + 'exposure {:.2f}s counts {:.0f} ADU -> {:.2f}s{}'.format(
+                exposure, counts, clamped_exposure, clamped_desc))
 
             if self._is_evening:
                 # Sky is decreasing in brightness
-                for min_exposure in CONFIG['evening_exposure_delays']:
-                    if new_exposure < min_exposure and counts > CONFIG['min_save_counts']:
-                        delay_exposure += CONFIG['evening_exposure_delays'][min_exposure]
+                for delay_exposure_limit, delay in evening_exposure_delays.items():
+                    if new_exposure < delay_exposure_limit and counts > min_save_counts:
+                        delay_exposure += delay
 
                 if delay_exposure > 0:
-                    print('AutoFlat: camera ' + self.camera_id + ' waiting ' + str(delay_exposure) +
-                          's for it to get darker')
+                    print(self._log_prefix + 'waiting {}s for it to get darker'.format(delay_exposure))
 
-                if clamped_exposure == CONFIG['max_exposure'] \
-                        and counts < CONFIG['min_save_counts']:
+                if clamped_exposure == max_exposure and counts < min_save_counts:
                     self.state = AutoFlatState.Complete
-                elif self.state == AutoFlatState.Waiting and counts > CONFIG['min_save_counts'] \
-                        and new_exposure > CONFIG['min_save_exposure']:
+                elif self.state == AutoFlatState.Waiting and counts > min_save_counts \
+                        and new_exposure > min_save_exposure:
                     self.state = AutoFlatState.Saving
             else:
                 # Sky is increasing in brightness
-                if clamped_exposure < CONFIG['min_save_exposure']:
+                if clamped_exposure < min_save_exposure:
                     self.state = AutoFlatState.Complete
-                elif self.state == AutoFlatState.Waiting and counts > CONFIG['min_save_counts']:
+                elif self.state == AutoFlatState.Waiting and counts > min_save_counts:
                     self.state = AutoFlatState.Saving
 
             if self.state != last_state:
@@ -233,19 +278,18 @@ class CameraWrapper:
                     self.state = AutoFlatState.Error
                     return
 
-                print('AutoFlat: camera ' + self.camera_id + ' ' + AutoFlatState.Names[last_state] +
-                      ' -> ' + AutoFlatState.Names[self.state])
+                print(self._log_prefix + AutoFlatState.Names[last_state] + ' -> ' + AutoFlatState.Names[self.state])
 
                 if self.state == AutoFlatState.Saving:
                     log.info(self._log_name, 'AutoFlat: {} saving enabled'.format(self.camera_id))
                 elif self.state == AutoFlatState.Complete:
-                    runtime = (datetime.datetime.utcnow() - self._start_time).total_seconds()
-                    message = 'AutoFlat: camera {} acquired {} flats in {:.0f} seconds'.format(
-                        self.camera_id, self._exposure_count, runtime)
+                    runtime = now - self._start_time
+                    message = self._log_prefix + 'acquired {} flats in {:.0f} seconds'.format(
+                        self._exposure_count, runtime)
                     log.info(self._log_name, message)
 
             if self.state != AutoFlatState.Complete:
-                self.__take_image(clamped_exposure, delay_exposure)
+                self.__take_image(clamped_exposure, delay_exposure, now)
 
     def abort(self):
         """Aborts any active exposures and sets the state to complete"""
@@ -256,6 +300,9 @@ class CameraWrapper:
 
 class SkyFlats(TelescopeAction):
     """Telescope action to acquire sky flats"""
+    # Validator for the assembled schema is built on first use
+    _validator = None
+
     def __init__(self, log_name, config):
         super().__init__('Sky Flats', log_name, config)
         self._wait_condition = threading.Condition()
@@ -265,17 +312,22 @@ class SkyFlats(TelescopeAction):
             self._cameras[camera_id] = CameraWrapper(camera_id, camera_daemon, self.config.get(camera_id, {}),
                                                      self.config['evening'], self.log_name)
 
+        # The camera set is fixed, so iterate over a tuple instead of the dictionary values
+        self._camera_list = tuple(self._cameras.values())
+
     @classmethod
     def validate_config(cls, config_json):
         """Returns an iterator of schema violations for the given json configuration"""
-        schema = {}
-        schema.update(CONFIG_SCHEMA)
-        for camera_id in cameras:
-            schema['properties'][camera_id] = camera_schema(camera_id)
+        if cls._validator is None:
+            schema = dict(CONFIG_SCHEMA)
+            schema['properties'] = dict(CONFIG_SCHEMA['properties'])
+            for camera_id in cameras:
+                schema['properties'][camera_id] = camera_schema(camera_id)
 
-        schema['properties']['pipeline'] = pipeline_schema()
+            schema['properties']['pipeline'] = pipeline_schema()
+            cls._validator = compile_validator(schema)
 
-        return validation.validation_errors(config_json, schema)
+        return cls._validator.iter_errors(config_json)
 
     def run_thread(self):
         """Thread that runs the hardware actions"""
@@ -291,6 +343,9 @@ class SkyFlats(TelescopeAction):
                                  height=ts['site_elevation'] * u.m)
         # pylint: enable=no-member
 
+        # Frame is reused for each sun position calculation, with only the obstime updated
+        frame = AltAz(location=location)
+
         # Configure pipeline immediately so the dashboard can show target name etc
         # Archiving will be enabled when the brightness is inside the required range
         pipeline_config = {}
@@ -306,7 +361,12 @@ class SkyFlats(TelescopeAction):
 
         while not self.aborted:
             waiting_for = []
-            sun_altitude = sun_position(location)[0]
+            sun_altitude = sun_position(frame)[0]
+            threshold = CONFIG['max_sun_altitude'] if self.config['evening'] else CONFIG['min_sun_altitude']
+            check_interval = abs(sun_altitude - threshold) / CONFIG['sun_altitude_rate']
+            check_interval = min(max(check_interval, CONFIG['min_sun_altitude_check_interval']),
+                                 CONFIG['max_sun_altitude_check_interval'])
+
             if self.config['evening']:
                 if sun_altitude < CONFIG['min_sun_altitude']:
                     print('AutoFlat: Sun already below minimum altitude')
@@ -346,7 +406,7 @@ class SkyFlats(TelescopeAction):
 
             self.set_task('Waiting for ' + ', '.join(waiting_for))
             with self._wait_condition:
-                self._wait_condition.wait(CONFIG['sun_altitude_check_interval'])
+                self._wait_condition.wait(check_interval)
 
         if self.aborted:
             self.status = TelescopeActionStatus.Complete
@@ -355,7 +415,7 @@ class SkyFlats(TelescopeAction):
         self.set_task('Slewing to antisolar point')
 
         # The anti-solar point is opposite the sun at 75 degrees
-        sun_altaz = sun_position(location)
+        sun_altaz = sun_position(frame)
         print('AutoFlat: Sun position is', sun_altaz)
 
         if not tel_slew_altaz(self.log_name, 75, sun_altaz[1] + 180, False, SLEW_TIMEOUT):
@@ -373,25 +433,27 @@ class SkyFlats(TelescopeAction):
         # Take an initial bias frame for calibration
         # This starts the autoflat logic, which is run
         # in the received_frame callbacks
-        for camera in self._cameras.values():
-            camera.start()
+        # The cameras are started in parallel so their first exposures are not staggered
+        list(cam_pool.map(CameraWrapper.start, self._camera_list))
 
         # Wait until complete
+        # The loop is woken by received_frame, abort, and dome_status_changed
+        # The camera states are checked before each wait so that cameras that failed
+        # to start are noticed immediately, and the wait is bounded so that cameras
+        # that are not expecting a frame (e.g. stuck in Bias) are still re-checked
         while True:
-            with self._wait_condition:
-                self._wait_condition.wait(5)
-
-            codes = ''
-            for camera in self._cameras.values():
-                camera.check_timeout()
-                codes += AutoFlatState.Codes[camera.state]
+            codes = []
+            now = time.monotonic()
+            for camera in self._camera_list:
+                camera.check_timeout(now)
+                codes.append(AutoFlatState.Codes[camera.state])
 
             self.set_task('Acquiring (' + ''.join(codes) + ')')
             if self.aborted:
                 break
 
             if not self.dome_is_open:
-                for camera in self._cameras.values():
+                for camera in self._camera_list:
                     camera.abort()
 
                 print('AutoFlat: Dome has closed')
@@ -399,11 +461,16 @@ class SkyFlats(TelescopeAction):
                 break
 
             # We are done once all cameras are either complete or have errored
-            if all([camera.state >= AutoFlatState.Complete for camera in self._cameras.values()]):
+            if all(camera.state >= AutoFlatState.Complete for camera in self._camera_list):
                 break
 
-        success = self.dome_is_open and all([camera.state == AutoFlatState.Complete
-                                             for camera in self._cameras.values()])
+            with self._wait_condition:
+                remaining = [camera.timeout_remaining() for camera in self._camera_list]
+                remaining = [r for r in remaining if r is not None]
+                self._wait_condition.wait(max(0.1, min(remaining + [5])))
+
+        success = self.dome_is_open and all(camera.state == AutoFlatState.Complete
+                                            for camera in self._camera_list)
 
         if self.aborted or success:
             self.status = TelescopeActionStatus.Complete
@@ -413,7 +480,7 @@ class SkyFlats(TelescopeAction):
     def abort(self):
         """Notification called when the telescope is stopped by the user"""
         super().abort()
-        for camera in self._cameras.values():
+        for camera in self._camera_list:
             camera.abort()
 
         with self._wait_condition:
@@ -431,5 +498,7 @@ class SkyFlats(TelescopeAction):
         camera_id = headers.get('CAMID', '').lower()
         if camera_id in self._cameras:
             self._cameras[camera_id].received_frame(headers)
+            with self._wait_condition:
+                self._wait_condition.notify_all()
         else:
             print('AutoFlat: Ignoring unknown frame')
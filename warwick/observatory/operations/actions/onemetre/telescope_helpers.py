@@ -16,150 +16,118 @@
 
 """Helper functions for actions to interact with the telescope mount"""
 
+import os
 import sys
 import traceback
 import Pyro4
 from warwick.observatory.common import daemons, log
+from warwick.observatory.operations import cached_connection
 from warwick.observatory.talon import CommandStatus as TelCommandStatus
 
+# Tracebacks for unexpected errors are only printed when OPSD_DEBUG is set in the environment
+_DEBUG = bool(os.environ.get('OPSD_DEBUG'))
+
 PARK_ALTAZ = (35, 25)
 PARK_TIMEOUT = 60
 INIT_TIMEOUT = 30
 HOME_TIMEOUT = 300
 
-def tel_status(log_name):
-    """Returns the telescope status dict or None on error"""
+def _tel_command(log_name, error_message, command, timeout=None, error_result=False):
+    """
+    Calls command with a connected telescope daemon proxy and returns its result
+    Communication and unexpected errors are logged and return error_result
+    """
     try:
-        with daemons.onemetre_telescope.connect() as teld:
-            return teld.report_status()
+        with cached_connection(daemons.onemetre_telescope, timeout=timeout) as teld:
+            return command(teld)
     except Pyro4.errors.CommunicationError:
         log.error(log_name, 'Failed to communicate with telescope daemon')
-        return None
+        return error_result
     except Exception:
-        log.error(log_name, 'Unknown error while querying telescope status')
-        traceback.print_exc(file=sys.stdout)
-        return None
+        log.error(log_name, error_message)
+        if _DEBUG:
+            traceback.print_exc(file=sys.stdout)
+        return error_result
+
+
+def _check_command_status(log_name, status, failure_message):
+    """Returns True if status indicates success, otherwise logs failure_message and returns False"""
+    if status != TelCommandStatus.Succeeded:
+        log.error(log_name, failure_message)
+        return False
+    return True
+
+
+def tel_status(log_name):
+    """Returns the telescope status dict or None on error"""
+    return _tel_command(log_name, 'Unknown error while querying telescope status',
+                        lambda teld: teld.report_status(), error_result=None)
 
 
 def tel_init(log_name):
     """Initialize the telescope"""
-    try:
-        with daemons.onemetre_telescope.connect(timeout=INIT_TIMEOUT) as teld:
-            return teld.initialize() in [TelCommandStatus.Succeeded, TelCommandStatus.TelescopeNotUninitialized]
-    except Pyro4.errors.CommunicationError:
-        log.error(log_name, 'Failed to communicate with telescope daemon')
-        return False
-    except Exception:
-        log.error(log_name, 'Unknown error while initializing telescope')
-        traceback.print_exc(file=sys.stdout)
-        return False
+    return _tel_command(log_name, 'Unknown error while initializing telescope',
+                        lambda teld: teld.initialize() in [TelCommandStatus.Succeeded,
+                                                           TelCommandStatus.TelescopeNotUninitialized],
+                        timeout=INIT_TIMEOUT)
 
 def tel_home(log_name):
     """Homes the telescope"""
-    try:
-        with daemons.onemetre_telescope.connect(timeout=HOME_TIMEOUT) as teld:
-            return teld.find_homes() == TelCommandStatus.Succeeded
-    except Pyro4.errors.CommunicationError:
-        log.error(log_name, 'Failed to communicate with telescope daemon')
-        return False
-    except Exception:
-        log.error(log_name, 'Unknown error while initializing telescope')
-        traceback.print_exc(file=sys.stdout)
-        return False
+    return _tel_command(log_name, 'Unknown error while initializing telescope',
+                        lambda teld: teld.find_homes() == TelCommandStatus.Succeeded,
+                        timeout=HOME_TIMEOUT)
 
 def tel_slew_radec(log_name, ra, dec, tracking, timeout):
     """Slew the telescope to a given RA, Dec"""
-    try:
-        with daemons.onemetre_telescope.connect(timeout=timeout) as teld:
-            if tracking:
-                status = teld.track_radec(ra, dec)
-            else:
-                status = teld.slew_radec(ra, dec)
-
-            if status != TelCommandStatus.Succeeded:
-                log.error(log_name, 'Failed to slew telescope')
-                return False
-            return True
-    except Pyro4.errors.CommunicationError:
-        log.error(log_name, 'Failed to communicate with telescope daemon')
-        return False
-    except Exception:
-        log.error(log_name, 'Unknown error while slewing telescope')
-        traceback.print_exc(file=sys.stdout)
-        return False
+    def slew(teld):
+        if tracking:
+            status = teld.track_radec(ra, dec)
+        else:
+            status = teld.slew_radec(ra, dec)
+        return _check_command_status(log_name, status, 'Failed to slew telescope')
+
+    return _tel_command(log_name, 'Unknown error while slewing telescope', slew, timeout=timeout)
 
 
 def tel_offset_radec(log_name, ra, dec, timeout):
     """Offset the telescope by a given RA, Dec"""
-    try:
-        with daemons.onemetre_telescope.connect(timeout=timeout) as teld:
-            status = teld.offset_radec(ra, dec)
-            if status != TelCommandStatus.Succeeded:
-                log.error(log_name, 'Failed to offset telescope position')
-                return False
-            return True
-    except Pyro4.errors.CommunicationError:
-        log.error(log_name, 'Failed to communicate with telescope daemon')
-        return False
-    except Exception:
-        log.error(log_name, 'Unknown error while offsetting telescope')
-        traceback.print_exc(file=sys.stdout)
-        return False
+    return _tel_command(log_name, 'Unknown error while offsetting telescope',
+                        lambda teld: _check_command_status(log_name, teld.offset_radec(ra, dec),
+                                                           'Failed to offset telescope position'),
+                        timeout=timeout)
 
 
 def tel_slew_altaz(log_name, alt, az, tracking, timeout):
     """Slew the telescope to a given Alt, Az"""
-    try:
-        with daemons.onemetre_telescope.connect(timeout=timeout) as teld:
-            if tracking:
-                status = teld.track_altaz(alt, az)
-            else:
-                status = teld.slew_altaz(alt, az)
-
-            if status != TelCommandStatus.Succeeded:
-                log.error(log_name, 'Failed to slew telescope')
-                return False
-            return True
-    except Pyro4.errors.CommunicationError:
-        log.error(log_name, 'Failed to communicate with telescope daemon')
-        return False
-    except Exception:
-        log.error(log_name, 'Unknown error while slewing telescope')
-        traceback.print_exc(file=sys.stdout)
-        return False
+    def slew(teld):
+        if tracking:
+            status = teld.track_altaz(alt, az)
+        else:
+            status = teld.slew_altaz(alt, az)
+        return _check_command_status(log_name, status, 'Failed to slew telescope')
+
+    return _tel_command(log_name, 'Unknown error while slewing telescope', slew, timeout=timeout)
 
 
 def tel_slew_hadec(log_name, ha, dec, timeout):
     """Slew the telescope to a given HA, Dec"""
-    try:
-        with daemons.onemetre_telescope.connect(timeout=timeout) as teld:
-            status = teld.slew_hadec(ha, dec)
-            if status != TelCommandStatus.Succeeded:
-                log.error(log_name, 'Failed to slew telescope')
-                return False
-            return True
-    except Pyro4.errors.CommunicationError:
-        log.error(log_name, 'Failed to communicate with telescope daemon')
-        return False
-    except Exception:
-        log.error(log_name, 'Unknown error while slewing telescope')
-        traceback.print_exc(file=sys.stdout)
-        return False
+    return _tel_command(log_name, 'Unknown error while slewing telescope',
+                        lambda teld: _check_command_status(log_name, teld.slew_hadec(ha, dec),
+                                                           'Failed to slew telescope'),
+                        timeout=timeout)
 
 
 def tel_stop(log_name):
     """Stop the telescope tracking or movement"""
-    try:
-        with daemons.onemetre_telescope.connect() as teld:
-            teld.stop()
+    def stop(teld):
+        # Don't wait for the daemon to acknowledge the stop so that aborts return immediately
+        # The proxy must be bound first, otherwise binding replaces the oneway method list
+        teld._pyroBind()  # pylint: disable=protected-access
+        teld._pyroOneway.add('stop')  # pylint: disable=protected-access
+        teld.stop()
         return True
-    except Pyro4.errors.CommunicationError:
-        log.error(log_name, 'Failed to communicate with telescope daemon')
-        return False
-    except Exception:
-        log.error(log_name, 'Unknown error while stopping telescope')
-        traceback.print_exc(file=sys.stdout)
-        return False
+
+    return _tel_command(log_name, 'Unknown error while stopping telescope', stop)
 
 
 def tel_park(log_name):
@@ -168,16 +136,7 @@ def tel_park(log_name):
 
 def tel_set_focus(log_name, position, timeout):
     """Set the given focuser channel to the given position"""
-    try:
-        with daemons.onemetre_telescope.connect(timeout=timeout) as teld:
-            if teld.telescope_focus(position) != TelCommandStatus.Succeeded:
-                log.error(log_name, 'Failed to set focuser position')
-                return False
-            return True
-    except Pyro4.errors.CommunicationError:
-        log.error(log_name, 'Failed to communicate with telescope daemon')
-        return False
-    except Exception:
-        log.error(log_name, 'Unknown error while stopping telescope')
-        traceback.print_exc(file=sys.stdout)
-        return False
+    return _tel_command(log_name, 'Unknown error while stopping telescope',
+                        lambda teld: _check_command_status(log_name, teld.telescope_focus(position),
+                                                           'Failed to set focuser position'),
+                        timeout=timeout)
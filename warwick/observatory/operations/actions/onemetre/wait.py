@@ -18,8 +18,7 @@
 
 import datetime
 import threading
-from warwick.observatory.common import validation
-from warwick.observatory.operations import TelescopeAction, TelescopeActionStatus
+from warwick.observatory.operations import TelescopeAction, TelescopeActionStatus, compile_validator
 
 CONFIG_SCHEMA = {
     'type': 'object',
@@ -34,6 +33,8 @@ CONFIG_SCHEMA = {
     }
 }
 
+CONFIG_VALIDATOR = compile_validator(CONFIG_SCHEMA)
+
 
 class Wait(TelescopeAction):
     """Telescope action to power on and prepare the telescope for observing"""
@@ -44,7 +45,7 @@ class Wait(TelescopeAction):
     @classmethod
     def validate_config(cls, config_json):
         """Returns an iterator of schema violations for the given json configuration"""
-        return validation.validation_errors(config_json, CONFIG_SCHEMA)
+        return CONFIG_VALIDATOR.iter_errors(config_json)
 
     def run_thread(self):
         """Thread that runs the hardware actions"""
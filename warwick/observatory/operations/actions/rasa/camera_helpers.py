@@ -26,10 +26,9 @@
 import sys
 import time
 import traceback
-from astropy.time import Time
-import astropy.units as u
 import Pyro4
 from warwick.observatory.common import log
+from warwick.observatory.operations import cached_connection
 from warwick.rasa.camera import CameraStatus, CommandStatus as CamCommandStatus
 
 
@@ -42,7 +41,7 @@ def take_images(log_name, daemon, count=1, config=None, quiet=False):
        before starting the sequence.
     """
     try:
-        with daemon.connect() as cam:
+        with cached_connection(daemon) as cam:
             if config:
                 status = cam.configure(config, quiet=quiet)
 
@@ -68,7 +67,7 @@ def take_images(log_name, daemon, count=1, config=None, quiet=False):
 def get_camera_status(log_name, daemon):
     """Returns the status dictionary for the camera"""
     try:
-        with daemon.connect() as camd:
+        with cached_connection(daemon) as camd:
             return camd.report_status()
     except Pyro4.errors.CommunicationError:
         print('Failed to communicate with camera daemon')
@@ -87,21 +86,24 @@ def stop_camera(log_name, daemon, timeout=-1):
        camera to return to Idle (or Disabled) status before returning
     """
     try:
-        with daemon.connect() as camd:
+        with cached_connection(daemon) as camd:
             status = camd.stop_sequence()
 
         if status != CamCommandStatus.Succeeded:
             return False
 
         if timeout > 0:
-            timeout_end = Time.now() + timeout * u.second
+            timeout_end = time.monotonic() + timeout
             while True:
-                with daemon.connect() as camd:
+                # Each poll takes its connection from the pool so that a connection
+                # closed by a camera daemon restart is replaced before it is used
+                with cached_connection(daemon) as camd:
                     data = camd.report_status()
-                    if data.get('state', CameraStatus.Idle) in [CameraStatus.Idle, CameraStatus.Disabled]:
-                        return True
 
-                wait = min(1, (timeout_end - Time.now()).to(u.second).value)
+                if data.get('state', CameraStatus.Idle) in [CameraStatus.Idle, CameraStatus.Disabled]:
+                    return True
+
+                wait = min(1, timeout_end - time.monotonic())
                 if wait <= 0:
                     return False
 
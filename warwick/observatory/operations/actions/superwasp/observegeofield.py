@@ -17,11 +17,12 @@
 """Telescope action to observe a static HA/Dec field within a defined time window"""
 
 import threading
+import time
 from astropy.time import Time
 import astropy.units as u
-from warwick.observatory.common import log, validation
-from warwick.observatory.operations import TelescopeAction, TelescopeActionStatus
-from .camera_helpers import cam_take_images, cam_stop
+from warwick.observatory.common import log
+from warwick.observatory.operations import TelescopeAction, TelescopeActionStatus, compile_validator
+from .camera_helpers import camera_ids, cam_pool, cam_take_images, cam_stop
 from .pipeline_helpers import configure_pipeline
 from .telescope_helpers import tel_slew_hadec
 
@@ -56,7 +57,7 @@ CONFIG_SCHEMA = {
             'type': 'array',
             'items': {
                 'type': 'string',
-                'enum': ['1', '2', '3', '4']
+                'enum': camera_ids
             }
         },
         'exposure': {
@@ -66,6 +67,8 @@ CONFIG_SCHEMA = {
     }
 }
 
+CONFIG_VALIDATOR = compile_validator(CONFIG_SCHEMA)
+
 
 class ObserveGEOField(TelescopeAction):
     """Telescope action to observe a static HA/Dec field within a defined time window"""
@@ -79,7 +82,7 @@ class ObserveGEOField(TelescopeAction):
     @classmethod
     def validate_config(cls, config_json):
         """Returns an iterator of schema violations for the given json configuration"""
-        return validation.validation_errors(config_json, CONFIG_SCHEMA)
+        return CONFIG_VALIDATOR.iter_errors(config_json)
 
     def __set_failed_status(self):
         """Sets self.status to Complete if aborted otherwise Error"""
@@ -88,6 +91,19 @@ class ObserveGEOField(TelescopeAction):
         else:
             self.status = TelescopeActionStatus.Error
 
+    def __wait_for_deadline(self, deadline):
+        """
+        Wait until a deadline, for a maximum of 10 seconds, or until the wait condition is notified
+        :param deadline: time.monotonic() value to wait for
+        :return: Number of seconds remaining until the deadline
+        """
+        remaining = deadline - time.monotonic()
+        if remaining > 0:
+            with self._wait_condition:
+                self._wait_condition.wait(min(10, remaining))
+            remaining = deadline - time.monotonic()
+        return remaining
+
     def __wait_until_or_aborted(self, target_time):
         """
         Wait until a specified time or the action has been aborted
@@ -95,14 +111,12 @@ class ObserveGEOField(TelescopeAction):
         :return: True if the time has been reached, false if aborted
         """
         onsky = self.config.get('onsky', True)
-        while True:
-            remaining = target_time - Time.now()
-            if remaining < 0 or self.aborted or (onsky and not self.dome_is_open):
+        # Convert to a monotonic deadline once so the loop doesn't need to construct astropy Times
+        deadline = time.monotonic() + (target_time - Time.now()).to_value(u.second)
+        while not self.aborted and (not onsky or self.dome_is_open):
+            if self.__wait_for_deadline(deadline) <= 0:
                 break
 
-            with self._wait_condition:
-                self._wait_condition.wait(min(10, remaining.to(u.second).value))
-
         return not self.aborted and self.dome_is_open
 
     def run_thread(self):
@@ -137,17 +151,22 @@ class ObserveGEOField(TelescopeAction):
             'exposure': self.config['exposure']
         }
 
-        for c in self.config['cameras']:
-            if not cam_take_images(self.log_name, c, 0, cam_config):
-                self.status = TelescopeActionStatus.Error
+        # Start and stop the cameras in parallel so that the overhead is set by the slowest camera
+        cameras = self.config['cameras']
+        started = list(cam_pool.map(lambda c: cam_take_images(self.log_name, c, 0, cam_config), cameras))
+
+        if not all(started):
+            self.status = TelescopeActionStatus.Error
+
+        # Wake up exactly at the end time instead of oversleeping by up to one check interval
+        end_deadline = time.monotonic() + (self._end_date - Time.now()).to_value(u.second)
 
         # Attempt to recover stalled cameras after 1 minute dead time
         while True:
             # Keep track of things while we observe
-            with self._wait_condition:
-                self._wait_condition.wait(10)
+            remaining = self.__wait_for_deadline(end_deadline)
 
-            if self.aborted or Time.now() > self._end_date:
+            if self.aborted or remaining <= 0:
                 self.status = TelescopeActionStatus.Complete
 
             if self.config.get('onsky', True) and not self.dome_is_open:
@@ -159,8 +178,7 @@ class ObserveGEOField(TelescopeAction):
             if self.status != TelescopeActionStatus.Incomplete:
                 break
 
-        for c in self.config['cameras']:
-            cam_stop(self.log_name, c)
+        list(cam_pool.map(lambda c: cam_stop(self.log_name, c), cameras))
 
     def received_frame(self, headers):
         """Notification called when a frame has been processed by the data pipeline"""
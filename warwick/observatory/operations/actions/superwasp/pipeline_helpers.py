@@ -20,13 +20,14 @@ import sys
 import traceback
 import Pyro4
 from warwick.observatory.common import daemons, log
+from warwick.observatory.operations import cached_connection
 from warwick.observatory.pipeline import CommandStatus as PipelineCommandStatus
 
 
 def pipeline_enable_archiving(log_name, camera_id, enabled):
     """Toggle archiving on or off for a given arm name"""
     try:
-        with daemons.superwasp_pipeline.connect() as pipeline:
+        with cached_connection(daemons.superwasp_pipeline) as pipeline:
             return pipeline.set_archive(camera_id, enabled) == PipelineCommandStatus.Succeeded
     except Pyro4.errors.CommunicationError:
         log.error(log_name, 'Failed to communicate with pipeline daemon')
@@ -40,7 +41,7 @@ def pipeline_enable_archiving(log_name, camera_id, enabled):
 def configure_pipeline(log_name, config, quiet=False):
     """Update pipeline configuration"""
     try:
-        with daemons.superwasp_pipeline.connect() as pipeline:
+        with cached_connection(daemons.superwasp_pipeline) as pipeline:
             return pipeline.configure(config, quiet=quiet) == PipelineCommandStatus.Succeeded
     except Pyro4.errors.CommunicationError:
         log.error(log_name, 'Failed to communicate with pipeline daemon')
@@ -16,8 +16,7 @@
 
 """Telescope action to slew the telescope to a given ra, dec"""
 
-from warwick.observatory.common import validation
-from warwick.observatory.operations import TelescopeAction, TelescopeActionStatus
+from warwick.observatory.operations import TelescopeAction, TelescopeActionStatus, compile_validator
 from .telescope_helpers import tel_slew_altaz, tel_stop
 
 SLEW_TIMEOUT = 120
@@ -44,6 +43,8 @@ CONFIG_SCHEMA = {
     }
 }
 
+CONFIG_VALIDATOR = compile_validator(CONFIG_SCHEMA)
+
 
 class SlewTelescopeAltAz(TelescopeAction):
     """Telescope action to slew the telescope to a given ra, dec"""
@@ -53,7 +54,7 @@ class SlewTelescopeAltAz(TelescopeAction):
     @classmethod
     def validate_config(cls, config_json):
         """Returns an iterator of schema violations for the given json configuration"""
-        return validation.validation_errors(config_json, CONFIG_SCHEMA)
+        return CONFIG_VALIDATOR.iter_errors(config_json)
 
     def run_thread(self):
         """Thread that runs the hardware actions"""
@@ -20,6 +20,7 @@ import sys
 import traceback
 import Pyro4
 from warwick.observatory.common import daemons, log
+from warwick.observatory.operations import cached_connection
 from warwick.observatory.talon import CommandStatus as TelCommandStatus
 
 PARK_ALTAZ = (89.9, 0)
@@ -29,7 +30,7 @@ PARK_TIMEOUT = 30
 def tel_status(log_name):
     """Returns the telescope status dict or None on error"""
     try:
-        with daemons.superwasp_telescope.connect() as teld:
+        with cached_connection(daemons.superwasp_telescope) as teld:
             return teld.report_status()
     except Pyro4.errors.CommunicationError:
         log.error(log_name, 'Failed to communicate with telescope daemon')
@@ -43,7 +44,7 @@ def tel_status(log_name):
 def tel_slew_radec(log_name, ra, dec, tracking, timeout):
     """Slew the telescope to a given RA, Dec"""
     try:
-        with daemons.superwasp_telescope.connect(timeout=timeout) as teld:
+        with cached_connection(daemons.superwasp_telescope, timeout=timeout) as teld:
             if tracking:
                 status = teld.track_radec(ra, dec)
             else:
@@ -65,7 +66,7 @@ def tel_slew_radec(log_name, ra, dec, tracking, timeout):
 def tel_offset_radec(log_name, ra, dec, timeout):
     """Offset the telescope by a given RA, Dec"""
     try:
-        with daemons.superwasp_telescope.connect(timeout=timeout) as teld:
+        with cached_connection(daemons.superwasp_telescope, timeout=timeout) as teld:
             status = teld.offset_radec(ra, dec)
             if status != TelCommandStatus.Succeeded:
                 log.error(log_name, 'Failed to offset telescope position')
@@ -83,7 +84,7 @@ def tel_offset_radec(log_name, ra, dec, timeout):
 def tel_slew_altaz(log_name, alt, az, tracking, timeout):
     """Slew the telescope to a given Alt, Az"""
     try:
-        with daemons.superwasp_telescope.connect(timeout=timeout) as teld:
+        with cached_connection(daemons.superwasp_telescope, timeout=timeout) as teld:
             if tracking:
                 status = teld.track_altaz(alt, az)
             else:
@@ -105,7 +106,7 @@ def tel_slew_altaz(log_name, alt, az, tracking, timeout):
 def tel_slew_hadec(log_name, ha, dec, timeout):
     """Slew the telescope to a given HA, Dec"""
     try:
-        with daemons.superwasp_telescope.connect(timeout=timeout) as teld:
+        with cached_connection(daemons.superwasp_telescope, timeout=timeout) as teld:
             status = teld.slew_hadec(ha, dec)
             if status != TelCommandStatus.Succeeded:
                 log.error(log_name, 'Failed to slew telescope')
@@ -123,7 +124,7 @@ def tel_slew_hadec(log_name, ha, dec, timeout):
 def tel_stop(log_name):
     """Stop the telescope tracking or movement"""
     try:
-        with daemons.superwasp_telescope.connect() as teld:
+        with cached_connection(daemons.superwasp_telescope) as teld:
             teld.stop()
         return True
     except Pyro4.errors.CommunicationError:
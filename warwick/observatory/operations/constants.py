@@ -90,9 +90,7 @@ class OperationsMode:
                 return cls._formats[status] + cls._labels[status] + TFmt.Clear
             return TFmt.Red + TFmt.Bold + 'UNKNOWN' + TFmt.Clear
 
-        if status in cls._labels:
-            return cls._labels[status]
-        return 'UNKNOWN'
+        return cls._labels.get(status, 'UNKNOWN')
 
 
 class DomeStatus:
@@ -124,9 +122,7 @@ class DomeStatus:
                 return cls._formats[status] + cls._labels[status] + TFmt.Clear
             return TFmt.Red + TFmt.Bold + 'UNKNOWN' + TFmt.Clear
 
-        if status in cls._labels:
-            return cls._labels[status]
-        return 'UNKNOWN'
+        return cls._labels.get(status, 'UNKNOWN')
 
 
 class ConditionStatus:
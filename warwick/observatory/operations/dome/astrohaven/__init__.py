@@ -23,6 +23,10 @@ from warwick.observatory.dome import (
 from warwick.observatory.operations.constants import DomeStatus
 from warwick.observatory.common import daemons, validation
 
+# Heartbeat and shutter states that map to DomeStatus.Timeout and DomeStatus.Moving
+HEARTBEAT_TRIPPED = frozenset([DomeHeartbeatStatus.TrippedClosing, DomeHeartbeatStatus.TrippedIdle])
+SHUTTER_MOVING = frozenset([DomeShutterStatus.Opening, DomeShutterStatus.Closing])
+
 CONFIG_SCHEMA = {
     'type': 'object',
     'additionalProperties': ['module'],
@@ -71,16 +75,15 @@ class DomeInterface:
         with self._daemon.connect() as dome:
             status = dome.status()
 
-        if status['heartbeat_status'] in [DomeHeartbeatStatus.TrippedClosing,
-                                          DomeHeartbeatStatus.TrippedIdle]:
+        if status['heartbeat_status'] in HEARTBEAT_TRIPPED:
             return DomeStatus.Timeout
 
-        if status['shutter_a'] == DomeShutterStatus.Closed and \
-                status['shutter_b'] == DomeShutterStatus.Closed:
+        shutter_a = status['shutter_a']
+        shutter_b = status['shutter_b']
+        if shutter_a == DomeShutterStatus.Closed and shutter_b == DomeShutterStatus.Closed:
             return DomeStatus.Closed
 
-        if status['shutter_a'] in [DomeShutterStatus.Opening, DomeShutterStatus.Closing] or \
-                status['shutter_b'] in [DomeShutterStatus.Opening, DomeShutterStatus.Closing]:
+        if shutter_a in SHUTTER_MOVING or shutter_b in SHUTTER_MOVING:
             return DomeStatus.Moving
 
         return DomeStatus.Open
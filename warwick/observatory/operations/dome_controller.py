@@ -19,33 +19,56 @@
 # pylint: disable=too-many-branches
 
 import datetime
+import os
 import threading
+import time
 
 from warwick.observatory.common import log
 from .constants import DomeStatus, OperationsMode
 
+# The per-loop dome status trace is only printed when OPSD_DEBUG is set in the environment
+_DEBUG = bool(os.environ.get('OPSD_DEBUG'))
+
+# Maximum delay (in seconds) between retries while the dome daemon cannot be contacted
+# The delay starts at the loop delay and doubles after each failed attempt
+MAX_DAEMON_ERROR_RETRY_DELAY = 300
+
 
 class DomeController:
     """Class managing automatic dome control for the operations daemon"""
     def __init__(self, config):
         self._config = config
-        self._lock = threading.Lock()
+
+        # Guards the shared state and wakes the loop thread when it changes
+        # There is only a single waiter (the loop thread), so notify() is sufficient
         self._wait_condition = threading.Condition()
 
         self._daemon_error = False
 
+        now = datetime.datetime.utcnow()
+
+        # The *_str fields cache the formatted dates that are reported by status()
+        # and must be updated whenever the corresponding date changes
         self._mode = OperationsMode.Manual
-        self._mode_updated = datetime.datetime.utcnow()
+        self._mode_updated = now
+        self._mode_updated_str = self._mode_updated.strftime('%Y-%m-%dT%H:%M:%SZ')
         self._requested_mode = OperationsMode.Manual
         self._requested_open_date = None
+        self._requested_open_str = None
         self._requested_close_date = None
+        self._requested_close_str = None
 
         self._status = DomeStatus.Closed
-        self._status_updated = datetime.datetime.utcnow()
+        self._status_updated = now
+        self._status_updated_str = self._status_updated.strftime('%Y-%m-%dT%H:%M:%SZ')
 
         self._environment_safe = False
         self._environment_safe_date = datetime.datetime.min
 
+        # time.monotonic() of the last environment update, used for the age check
+        # so that it is not affected by changes to the system clock
+        self._environment_safe_monotonic = float('-inf')
+
         self._dome_interface = config.dome_interface_type(config.dome_json)
 
         loop = threading.Thread(target=self.__loop)
@@ -54,25 +77,32 @@ class DomeController:
 
     def __set_status(self, status):
         """Updates the dome status and resets the last updated time"""
-        with self._lock:
+        now = datetime.datetime.utcnow()
+        now_str = now.strftime('%Y-%m-%dT%H:%M:%SZ')
+        with self._wait_condition:
             self._status = status
-            self._status_updated = datetime.datetime.utcnow()
+            self._status_updated = now
+            self._status_updated_str = now_str
 
     def __set_mode(self, mode):
         """Updates the dome control mode and resets the last updated time"""
-        with self._lock:
+        now = datetime.datetime.utcnow()
+        now_str = now.strftime('%Y-%m-%dT%H:%M:%SZ')
+        with self._wait_condition:
             self._mode = mode
-            self._mode_updated = datetime.datetime.utcnow()
+            self._mode_updated = now
+            self._mode_updated_str = now_str
 
     def __loop(self):
         """Thread that controls dome opening/closing to match requested state"""
+        retry_delay = self._config.loop_delay
         while True:
             # Handle requests from the user to change between manual and automatic mode
             # Manual intervention is required to clear errors and return to automatic mode.
             # If an error does occur the dome heartbeat will timeout, and it will close itself.
 
             # Copy public facing variables to avoid race conditions
-            with self._lock:
+            with self._wait_condition:
                 requested_mode = self._requested_mode
 
                 current_date = datetime.datetime.utcnow()
@@ -83,7 +113,7 @@ class DomeController:
                                  self._environment_safe_date > self._requested_open_date
 
                 requested_status = DomeStatus.Open if requested_open else DomeStatus.Closed
-                environment_safe_age = (current_date - self._environment_safe_date).total_seconds()
+                environment_safe_age = time.monotonic() - self._environment_safe_monotonic
 
             auto_failure = self._mode == OperationsMode.Error and \
                 requested_mode == OperationsMode.Automatic
@@ -109,6 +139,7 @@ class DomeController:
                             log.error(self._config.log_name, 'Failed to switch dome to Manual mode')
                     if self._daemon_error:
                         log.info(self._config.log_name, 'Restored contact with Dome daemon')
+                        self._daemon_error = False
                 except Exception:
                     if not self._daemon_error:
                         log.error(self._config.log_name, 'Lost contact with Dome daemon')
@@ -121,8 +152,9 @@ class DomeController:
                     status = self._dome_interface.query_status()
                     self.__set_status(status)
 
-                    print('dome: is ' + DomeStatus.label(status) + ' and wants to be ' +
-                          DomeStatus.label(requested_status))
+                    if _DEBUG:
+                        print('dome: is ' + DomeStatus.label(status) + ' and wants to be ' +
+                              DomeStatus.label(requested_status))
 
                     if status == DomeStatus.Timeout:
                         print('dome: detected heartbeat timeout!')
@@ -153,36 +185,53 @@ class DomeController:
                 self.clear_open_window()
 
             # Wait for the next loop period, unless woken up early by __shortcut_loop_wait
+            # Automatic mode needs regular status checks and heartbeat pings, and failed mode changes
+            # are retried every loop period. Otherwise there is nothing to do until the mode or window
+            # is changed (which wakes the loop), or the end of the window is reached and must be cleared.
+            # The state is read under the wait condition so that a change cannot be missed before waiting
+            # Retries are backed off while the dome daemon cannot be contacted
+            if self._daemon_error:
+                timeout = retry_delay
+                retry_delay = min(2 * retry_delay, MAX_DAEMON_ERROR_RETRY_DELAY)
+            else:
+                timeout = retry_delay = self._config.loop_delay
+
             with self._wait_condition:
-                self._wait_condition.wait(self._config.loop_delay)
+                requested_mode = self._requested_mode
+                auto_failure = self._mode == OperationsMode.Error and \
+                    requested_mode == OperationsMode.Automatic
+
+                if self._mode != OperationsMode.Automatic and (requested_mode == self._mode or auto_failure):
+                    close_date = self._requested_close_date
+                    if close_date is None:
+                        timeout = None
+                    else:
+                        timeout = max(0.1, (close_date - datetime.datetime.utcnow()).total_seconds())
+
+                self._wait_condition.wait(timeout)
 
     def __shortcut_loop_wait(self):
-        """Makes the run loop continue immediately if it is currently sleeping"""
-        with self._wait_condition:
-            self._wait_condition.notify_all()
+        """Makes the run loop continue immediately if it is currently sleeping
+           Must be called with self._wait_condition held
+        """
+        self._wait_condition.notify()
 
     def status(self):
         """Returns a dictionary with the current dome status"""
-        with self._lock:
-            open_str = None
-            if self._requested_open_date:
-                open_str = self._requested_open_date.strftime('%Y-%m-%dT%H:%M:%SZ')
-            close_str = None
-            if self._requested_close_date:
-                close_str = self._requested_close_date.strftime('%Y-%m-%dT%H:%M:%SZ')
+        with self._wait_condition:
             return {
                 'mode': self._mode,
-                'mode_updated': self._mode_updated.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'mode_updated': self._mode_updated_str,
                 'status': self._status,
-                'status_updated': self._status_updated.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'status_updated': self._status_updated_str,
                 'requested_mode': self._requested_mode,
-                'requested_open_date': open_str,
-                'requested_close_date': close_str,
+                'requested_open_date': self._requested_open_str,
+                'requested_close_date': self._requested_close_str,
             }
 
     def request_mode(self, mode):
         """Request a dome mode change (automatic/manual)"""
-        with self._lock:
+        with self._wait_condition:
             self._requested_mode = mode
             self.__shortcut_loop_wait()
 
@@ -198,25 +247,31 @@ class DomeController:
                 not isinstance(dates[1], datetime.datetime):
             return False
 
-        with self._lock:
+        # Only update the state while holding the lock, so the loop thread isn't blocked by the logging
+        open_str = dates[0].strftime('%Y-%m-%dT%H:%M:%SZ')
+        close_str = dates[1].strftime('%Y-%m-%dT%H:%M:%SZ')
+
+        with self._wait_condition:
             self._requested_open_date = dates[0]
             self._requested_close_date = dates[1]
-
-            open_str = dates[0].strftime('%Y-%m-%dT%H:%M:%SZ')
-            close_str = dates[1].strftime('%Y-%m-%dT%H:%M:%SZ')
-            log.info(self._config.log_name, 'Scheduled dome window ' + open_str + ' - ' + close_str)
-
+            self._requested_open_str = open_str
+            self._requested_close_str = close_str
             self.__shortcut_loop_wait()
-            return True
+
+        log.info(self._config.log_name, 'Scheduled dome window ' + open_str + ' - ' + close_str)
+        return True
 
     def clear_open_window(self):
         """
         Clears the times that the dome should be automatically open
         The dome will automatically close if it is currently within this window
         """
-        self._requested_open_date = self._requested_close_date = None
+        with self._wait_condition:
+            self._requested_open_date = self._requested_close_date = None
+            self._requested_open_str = self._requested_close_str = None
+            self.__shortcut_loop_wait()
+
         log.info(self._config.log_name, 'Cleared dome window')
-        self.__shortcut_loop_wait()
 
     def notify_environment_status(self, is_safe):
         """
@@ -228,6 +283,7 @@ class DomeController:
         now = datetime.datetime.utcnow()
         self._environment_safe = is_safe
         self._environment_safe_date = now
+        self._environment_safe_monotonic = time.monotonic()
 
         # Clear the dome schedule (forcing it to close) if the night has started
         if not is_safe and self._requested_open_date and now > self._requested_open_date:
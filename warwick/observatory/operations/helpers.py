@@ -0,0 +1,107 @@
+#
+# This file is part of opsd.
+#
+# opsd is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# opsd is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with opsd.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Helper functions shared by the operations daemon and telescope actions"""
+
+from contextlib import contextmanager
+import functools
+import select
+import threading
+import jsonschema
+import Pyro4
+
+# Idle Pyro proxies, keyed by daemon. A proxy is removed from the pool while it is in use,
+# so it is only ever used by one thread at a time, and the number of open connections to
+# each daemon is bounded by the number of concurrent calls rather than the number of threads
+_proxy_pool_lock = threading.Lock()
+_proxy_pool = {}
+
+
+@functools.lru_cache(maxsize=None)
+def _validator_class(additional_validators):
+    """
+    Returns a Draft 4 jsonschema validator class extended with the given
+    tuple of (keyword, function) pairs. Classes are cached, so keyword functions
+    should be defined once (e.g. at module level) rather than per call
+    """
+    validators = dict(jsonschema.Draft4Validator.VALIDATORS)
+    validators.update(additional_validators)
+    return jsonschema.validators.create(meta_schema=jsonschema.Draft4Validator.META_SCHEMA,
+                                        validators=validators)
+
+
+def compile_validator(schema, additional_validators=None):
+    """
+    Returns a jsonschema validator object that applies the same checks as
+    warwick.observatory.common.validation.validation_errors
+    The returned object can be stored and its iter_errors method reused
+    to avoid rebuilding the validator every time a json object is validated
+    """
+    validator = _validator_class(tuple(sorted(additional_validators.items())) if additional_validators else ())
+    return validator(schema, format_checker=jsonschema.draft4_format_checker)
+
+
+def _connection_closed(proxy):
+    """
+    Returns True if the daemon has closed the proxy's connection (e.g. because it was restarted)
+    This is checked locally without a round trip to the daemon: an idle Pyro connection never
+    has unread data, so a readable socket means that the peer has closed it
+    """
+    connection = proxy._pyroConnection
+    if connection is None:
+        return False
+
+    try:
+        readable, _, _ = select.select([connection.sock], [], [], 0)
+        return bool(readable)
+    except (OSError, ValueError):
+        return True
+
+
+@contextmanager
+def cached_connection(daemon, timeout=None):
+    """
+    Context manager that provides a Pyro proxy to daemon, like daemon.connect(),
+    but keeps the connection open to be reused by later calls
+    A connection that has been closed by the daemon is replaced before it is used
+    timeout overrides the daemon's default timeout for calls made within the context
+    """
+    with _proxy_pool_lock:
+        idle = _proxy_pool.get(id(daemon))
+        entry = idle.pop() if idle else None
+
+    if entry is not None and _connection_closed(entry[0]):
+        entry[0]._pyroRelease()
+        entry = None
+
+    if entry is None:
+        proxy = daemon.connect()
+        entry = (proxy, proxy._pyroTimeout)
+
+    proxy, default_timeout = entry
+    proxy._pyroTimeout = default_timeout if timeout is None else timeout
+    discard = False
+    try:
+        yield proxy
+    except Pyro4.errors.CommunicationError:
+        # Discard the proxy so that later calls start from a fresh connection
+        discard = True
+        proxy._pyroRelease()
+        raise
+    finally:
+        if not discard:
+            with _proxy_pool_lock:
+                _proxy_pool.setdefault(id(daemon), []).append(entry)
@@ -17,91 +17,149 @@
 """Helper functions for validating and parsing schedule JSON objects into actions"""
 
 import datetime
+import functools
+import itertools
 import sys
+import threading
 import traceback
 import jsonschema
 from skyfield import almanac
 from skyfield.api import Loader
-from astropy.time import Time
-import astropy.units as u
-from warwick.observatory.common import validation
+from .helpers import compile_validator
 
-def __format_errors(errors):
-    for error in sorted(errors, key=lambda e: e.path):
+# The ephemeris is loaded from disk on first use and then shared between schedule validations
+_ephemeris_lock = threading.Lock()
+_ephemeris = None
+
+def __format_errors(errors, fast=False):
+    """Yields error messages for the given iterable of ValidationErrors
+       If fast is True only the first error is yielded, without evaluating the remaining schema
+    """
+    if fast:
+        errors = itertools.islice(errors, 1)
+
+    # Errors are reported in the order that jsonschema visits the schema, which
+    # is already stable between runs, so there is no need to sort them
+    for error in errors:
         if error.path:
-            path = '->'.join([str(p) for p in error.path])
-            yield path + ': ' + error.message
+            yield '->'.join(map(str, error.path)) + ': ' + error.message
         else:
             yield error.message
 
 
-def __validate_dome(block, config, night):
-    """Returns a list of error messages that stop json from defining a valid dome schedule"""
+def __load_ephemeris():
+    """Returns a tuple of the skyfield (timescale, ephemeris), loading them on the first call"""
+    global _ephemeris  # pylint: disable=global-statement
+    with _ephemeris_lock:
+        if _ephemeris is None:
+            loader = Loader('/var/tmp/')
+            _ephemeris = (loader.timescale(), loader('de421.bsp'))
+        return _ephemeris
+
+
+def __parse_utc_date(value):
+    """
+    Parses a YYYY-MM-DDTHH:MM:SSZ string into a naive UTC datetime
+    Equivalent to (but much faster than) datetime.strptime with the same format
+    Raises ValueError if value does not match the format
+    """
+    if len(value) != 20 or value[4] != '-' or value[7] != '-' or value[10] != 'T' \
+            or value[13] != ':' or value[16] != ':' or value[19] != 'Z':
+        raise ValueError('{} does not match format YYYY-MM-DDTHH:MM:SSZ'.format(value))
+
+    # The separators have been checked above, so slicing out the fields accepts only strings
+    # in the same format, and the datetime constructor rejects out-of-range fields, like strptime
+    # (datetime.fromisoformat is not available on the python 3.6 deployment target)
+    return datetime.datetime(int(value[0:4]), int(value[5:7]), int(value[8:10]),
+                             int(value[11:13]), int(value[14:16]), int(value[17:19]))
+
+
+def __current_night():
+    """Returns the YYYY-MM-DD date of the current observing night, which rolls over at midday UTC"""
+    now = datetime.datetime.utcnow()
+    if now.hour < 12:
+        now -= datetime.timedelta(days=1)
+    return now.strftime('%Y-%m-%d')
+
+
+@functools.lru_cache(maxsize=64)
+def __night_bounds(site_location, night):
+    """Returns a tuple of the (sunset, sunrise) naive utc datetimes for the given night and site location"""
+    ts, eph = __load_ephemeris()
+    sun_above_horizon = almanac.risings_and_settings(eph, eph['Sun'], site_location)
+
+    # Search for sunset/sunrise between midday on 'night' and midday the following day
+    night_date = datetime.datetime.strptime(night, '%Y-%m-%d')
+    night_search_start = ts.utc(night_date.year, night_date.month, night_date.day, 12)
+    night_search_end = ts.tt_jd(night_search_start.tt + 1)
+    events, _ = almanac.find_discrete(night_search_start, night_search_end, sun_above_horizon)
+    return events[0].utc_datetime().replace(tzinfo=None), events[1].utc_datetime().replace(tzinfo=None)
+
+
+# pylint: disable=unused-argument
+def __require_night(validator, value, instance, schema):
+    """Validator for the require-night keyword, which forces a tagged date to match
+       the night defined in the observing plan
+       value is a tuple of the (sunset, sunrise) naive utc datetimes for the night
+       Returns a tuple of errors rather than yielding them to avoid creating a generator per date
+    """
     try:
-        loader = Loader('/var/tmp/')
-        ts = loader.timescale()
-        eph = loader('de421.bsp')
-
-        sun_above_horizon = almanac.risings_and_settings(eph, eph['Sun'], config.site_location)
-
-        # Search for sunset/sunrise between midday on 'night' and midday the following day
-        night_date = datetime.datetime.strptime(night, '%Y-%m-%d')
-        night_search_start = ts.utc(night_date.year, night_date.month, night_date.day, 12)
-        night_search_end = ts.tt_jd(night_search_start.tt + 1)
-        events, _ = almanac.find_discrete(night_search_start, night_search_end, sun_above_horizon)
-        night_start = events[0].utc_datetime()
-        night_end = events[1].utc_datetime()
-
-        # pylint: disable=unused-argument
-        def require_night(validator, value, instance, schema):
-            """Create a validator object that forces a tagged date to match
-               the night defined in the observing plan
-            """
-            try:
-                date = datetime.datetime.strptime(instance, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=datetime.timezone.utc)
-            except Exception:
-                yield jsonschema.ValidationError('{} is not a valid datetime'.format(instance))
-                return
-
-            if value and (date < night_start or date > night_end):
-                start_str = night_start.strftime('%Y-%m-%dT%H:%M:%SZ')
-                end_str = night_end.strftime('%Y-%m-%dT%H:%M:%SZ')
-                yield jsonschema.ValidationError("{} is not between {} and {}".format(
-                    instance, start_str, end_str))
-
-        # pylint: enable=unused-argument
-
-        schema = {
-            'type': 'object',
-            'additionalProperties': False,
-            'required': ['open', 'close'],
-            'properties': {
-                'open': {
-                    'type': 'string',
-                    'format': 'date-time',
-                    'require-night': True
-                },
-                'close': {
-                    'type': 'string',
-                    'format': 'date-time',
-                    'require-night': True
-                }
+        date = __parse_utc_date(instance)
+    except Exception:
+        return (jsonschema.ValidationError('{} is not a valid datetime'.format(instance)),)
+
+    night_start, night_end = value
+    if date < night_start or date > night_end:
+        start_str = night_start.strftime('%Y-%m-%dT%H:%M:%SZ')
+        end_str = night_end.strftime('%Y-%m-%dT%H:%M:%SZ')
+        return (jsonschema.ValidationError("{} is not between {} and {}".format(
+            instance, start_str, end_str)),)
+
+    return ()
+
+# pylint: enable=unused-argument
+
+
+@functools.lru_cache(maxsize=64)
+def __dome_validator(site_location, night):
+    """Returns a validator for the dome block of a schedule for the given night and site location"""
+    # The night bounds are passed through the schema so that require-night is a
+    # module-level function and compile_validator can reuse its validator class
+    # require-night also validates the date format, so the fields don't need a separate format check
+    night_bounds = __night_bounds(site_location, night)
+    schema = {
+        'type': 'object',
+        'additionalProperties': False,
+        'required': ['open', 'close'],
+        'properties': {
+            'open': {
+                'type': 'string',
+                'require-night': night_bounds
+            },
+            'close': {
+                'type': 'string',
+                'require-night': night_bounds
             }
         }
+    }
 
-        errors = __format_errors(validation.validation_errors(block, schema, {
-            'require-night': require_night
-        }))
+    return compile_validator(schema, {
+        'require-night': __require_night
+    })
 
+
+def __validate_dome(block, config, night, fast):
+    """Returns a list of error messages that stop json from defining a valid dome schedule"""
+    # Messages are generated lazily, so the prefixed list must be built inside the try block
+    try:
+        validator = __dome_validator(config.site_location, night)
+        return ['dome: ' + e for e in __format_errors(validator.iter_errors(block), fast)]
     except Exception:
-        errors = ['exception while validating']
         traceback.print_exc(file=sys.stdout)
-
-    # Prefix each message with the action index and type
-    return ['dome: ' + e for e in errors]
+        return ['dome: exception while validating']
 
 
-def __validate_action(index, block, action_types):
+def __validate_action(index, block, action_types, fast):
     """Validates an action block and returns a list of any schema violations"""
     if 'type' not in block:
         return ['action ' + str(index) + ": missing key 'type'"]
@@ -109,22 +167,22 @@ def __validate_action(index, block, action_types):
     if block['type'] not in action_types:
         return ['action ' + str(index) + ": unknown action type '" + block['type'] + "'"]
 
+    # Prefix each message with the action index and type
+    prefix = 'action ' + str(index) + ' (' + block['type'] + '): '
     try:
-        errors = __format_errors(action_types[block['type']].validate_config(block))
+        return [prefix + e for e in __format_errors(action_types[block['type']].validate_config(block), fast)]
     except Exception:
-        errors = ['exception while validating']
         traceback.print_exc(file=sys.stdout)
-
-    # Prefix each message with the action index and type
-    return ['action ' + str(index) + ' (' + block['type'] + '): ' + e for e in errors]
+        return [prefix + 'exception while validating']
 
 
-def validate_schedule(json, config, require_tonight):
+def validate_schedule(json, config, require_tonight, fast=False):
     """
     Tests whether a json object defines a valid opsd schedule
     Returns a tuple of (valid, messages) where:
        valid is a boolean indicating whether the schedule is valid
        messages is a list of strings describing errors in the schedule
+    Set fast=True to stop at the first error, for callers that only need to know whether the schedule is valid
     """
 
     errors = []
@@ -134,26 +192,31 @@ def validate_schedule(json, config, require_tonight):
         errors.append('missing key \'night\'')
     else:
         try:
-            schedule_night = Time.strptime(json['night'], '%Y-%m-%d') + 12 * u.hour
+            # Normalize the date so that it can be compared directly against the current night
+            schedule_night = datetime.datetime.strptime(json['night'], '%Y-%m-%d').strftime('%Y-%m-%d')
         except ValueError:
             errors.append('night: {} is not a valid date'.format(json['night']))
 
     # Errors with 'night' are fatal
     if errors:
-        return True, errors
+        return False, errors
 
-    current_night = Time.now()
-    if current_night.to_datetime().hour < 12:
-        current_night -= 1 * u.day
-    current_night = Time.strptime(current_night.strftime('%Y-%m-%d'), '%Y-%m-%d') + 12 * u.hour
+    current_night = __current_night()
+
+    if fast and require_tonight and current_night != schedule_night:
+        return False, ['night: {} is not tonight ({})'.format(schedule_night, current_night)]
 
     if 'dome' in json:
-        errors.extend(__validate_dome(json['dome'], config, json['night']))
+        errors.extend(__validate_dome(json['dome'], config, json['night'], fast))
+        if fast and errors:
+            return False, errors
 
     if 'actions' in json:
         if isinstance(json['actions'], list):
             for i, action in enumerate(json['actions']):
-                errors.extend(__validate_action(i, action, config.actions))
+                errors.extend(__validate_action(i, action, config.actions, fast))
+                if fast and errors:
+                    return False, errors
         else:
             errors.append('actions: must be a list')
     else:
@@ -166,13 +229,9 @@ def validate_schedule(json, config, require_tonight):
     if current_night != schedule_night:
         if require_tonight:
             is_valid = False
-            errors.insert(0, 'night: {} is not tonight ({})'.format(
-                schedule_night.strftime('%Y-%m-%d'),
-                current_night.strftime('%Y-%m-%d')))
+            errors.insert(0, 'night: {} is not tonight ({})'.format(schedule_night, current_night))
         else:
-            errors.insert(0, 'info: night {} is not tonight ({})'.format(
-                schedule_night.strftime('%Y-%m-%d'),
-                current_night.strftime('%Y-%m-%d')))
+            errors.insert(0, 'info: night {} is not tonight ({})'.format(schedule_night, current_night))
     return is_valid, errors
 
 
@@ -181,15 +240,14 @@ def parse_schedule_actions(config, json):
     Parses a json object into a list of TelescopeActions
     to be run by the telescope control thread
     """
-    actions = []
+    action_types = config.actions
+    log_name = config.log_name
     try:
-        for action in json['actions']:
-            actions.append(config.actions[action['type']](config.log_name, action))
+        return [action_types[action['type']](log_name, action) for action in json['actions']]
     except Exception:
         print('exception while parsing schedule')
         traceback.print_exc(file=sys.stdout)
         return []
-    return actions
 
 
 def parse_dome_window(json):
@@ -198,10 +256,14 @@ def parse_dome_window(json):
     Returns a tuple of the open and close dates
     or None if the json does not define a dome block
     """
-    if 'dome' in json and 'open' in json['dome'] and 'close' in json['dome']:
-        # These dates have already been validated by __validate_dome
-        open_date = datetime.datetime.strptime(json['dome']['open'], '%Y-%m-%dT%H:%M:%SZ')
-        close_date = datetime.datetime.strptime(json['dome']['close'], '%Y-%m-%dT%H:%M:%SZ')
-        return open_date, close_date
+    if 'dome' not in json:
+        return None
 
-    return None
+    # Don't assume that the schedule has been validated: the dome block may be missing keys
+    # or not be a dict, and __parse_utc_date raises ValueError for malformed strings and
+    # TypeError for values that aren't strings
+    try:
+        dome = json['dome']
+        return __parse_utc_date(dome['open']), __parse_utc_date(dome['close'])
+    except (KeyError, TypeError, ValueError):
+        return None